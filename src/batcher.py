@@ -0,0 +1,116 @@
+"""Coalesce concurrent writes into a single database round trip."""
+
+import asyncio
+import logging
+from collections.abc import Sequence
+
+import libsql_client
+
+logger = logging.getLogger("acrobot.batcher")
+
+type _Pending = tuple[
+    list[libsql_client.Statement], asyncio.Future[list[libsql_client.ResultSet]]
+]
+
+
+class WriteBatcher:
+    """
+    Collect write statements from concurrent callers and flush them together.
+
+    Submissions that arrive within `window` seconds of each other are sent as a
+    single `client.batch` call, which libsql runs as one transaction in one round
+    trip. If a combined batch fails, each submission is retried on its own so
+    that one bad write doesn't fail its neighbors.
+    """
+
+    def __init__(
+        self, client: libsql_client.Client, window: float = 0.005, max_size: int = 64
+    ) -> None:
+        self._client = client
+        self._window = window
+        self._max_size = max_size
+        self._queue: asyncio.Queue[_Pending | None] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the background task that drains the queue."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Flush whatever is still queued and stop the background task."""
+        if self._task is None:
+            return
+
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def submit(
+        self, stmts: Sequence[libsql_client.Statement]
+    ) -> list[libsql_client.ResultSet]:
+        """
+        Queue statements to run atomically and wait until they're committed.
+        Returns the result set of each submitted statement.
+        """
+        if self._task is None:
+            raise RuntimeError("Write batcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((list(stmts), future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self._window
+
+            # Keep collecting until the window closes or the batch is full
+            while len(batch) < self._max_size:
+                try:
+                    pending = await asyncio.wait_for(
+                        self._queue.get(), deadline - loop.time()
+                    )
+                except TimeoutError:
+                    break
+
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list[_Pending]) -> None:
+        try:
+            result_sets = await self._client.batch(
+                [stmt for stmts, _ in batch for stmt in stmts]
+            )
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning("Batched write failed, retrying %d writes", len(batch))
+                for pending in batch:
+                    await self._flush([pending])
+                return
+
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        # Hand each submission back the result sets of its own statements
+        start = 0
+        for stmts, future in batch:
+            end = start + len(stmts)
+            if not future.done():
+                future.set_result(result_sets[start:end])
+            start = end
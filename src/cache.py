@@ -0,0 +1,75 @@
+"""In-process caches for repository lookups."""
+
+import time
+from collections import OrderedDict
+
+
+class LRUCache[K, V]:
+    """A bounded mapping that evicts the least recently used entry when full."""
+
+    def __init__(self, maxsize: int) -> None:
+        """A non-positive `maxsize` disables the cache entirely."""
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value and mark it as recently used."""
+        if key not in self._data:
+            return None
+
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        """Cache a value, evicting the least recently used entry if needed."""
+        if self.maxsize <= 0:
+            return
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """Drop a single entry if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+
+
+class TTLCache[V]:
+    """A single cached value that expires `ttl` seconds after being set."""
+
+    def __init__(self, ttl: float) -> None:
+        """A non-positive `ttl` disables the cache entirely."""
+        self.ttl = ttl
+        self._value: V | None = None
+        self._expires_at = 0.0
+
+    def get(self) -> V | None:
+        """Return the cached value unless it has expired."""
+        if time.monotonic() >= self._expires_at:
+            return None
+
+        return self._value
+
+    def set(self, value: V) -> None:
+        """Cache a value for the next `ttl` seconds."""
+        if self.ttl <= 0:
+            return
+
+        self._value = value
+        self._expires_at = time.monotonic() + self.ttl
+
+    def clear(self) -> None:
+        """Drop the cached value."""
+        self._value = None
+        self._expires_at = 0.0
@@ -1,5 +1,7 @@
+import asyncio
 import logging
-import shlex
+import re
+from collections.abc import Awaitable, Callable
 from enum import StrEnum
 
 from telegram import Update
@@ -8,6 +10,8 @@ from telegram.ext import ContextTypes
 
 from src.repo import SqliteRepository, Status
 
+logger = logging.getLogger("acrobot.cmds")
+
 
 # Commands Enum
 class Commands(StrEnum):
@@ -21,16 +25,75 @@ class Commands(StrEnum):
     LIST = "list"
 
 
+# Whitespace, a double-quoted chunk, a single-quoted chunk, a bare chunk, or a stray
+# quote or trailing backslash. Backslashes escape any character in bare chunks and
+# only `"` or `\` inside double quotes; single quotes take everything literally.
+_TOKEN_RE = re.compile(
+    r"""(\s+)|"((?:[^"\\]|\\.)*)"|'([^']*)'|((?:[^\s"'\\]|\\.)+)|(["'\\])""",
+    re.DOTALL,
+)
+_BARE_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_QUOTED_ESCAPE_RE = re.compile(r'\\(["\\])')
+
+
+def split_command_args(command_args: str) -> list[str]:
+    """
+    Split command arguments on whitespace, honoring quotes and backslash escapes.
+    Adjacent chunks are glued together and escapes follow the same rules as
+    `shlex.split` in POSIX mode.
+    """
+
+    # Without quotes or escapes this is a plain whitespace split, which str.split
+    # does in C
+    if not any(char in command_args for char in "\"'\\"):
+        return command_args.split()
+
+    args: list[str] = []
+    token: list[str] | None = None
+
+    for match in _TOKEN_RE.finditer(command_args):
+        space, double_quoted, single_quoted, bare, stray = match.groups()
+
+        if stray == "\\":
+            raise ValueError("No escaped character.")
+        if stray:
+            raise ValueError("No closing quotation.")
+
+        if space:
+            if token is not None:
+                args.append("".join(token))
+            token = None
+            continue
+
+        if token is None:
+            token = []
+        if double_quoted is not None:
+            token.append(_QUOTED_ESCAPE_RE.sub(r"\1", double_quoted))
+        elif bare is not None:
+            token.append(_BARE_ESCAPE_RE.sub(r"\1", bare))
+        else:
+            token.append(single_quoted)
+
+    if token is not None:
+        args.append("".join(token))
+
+    return args
+
+
 def parse_command_args(
-    command_args: str, require_values: bool = True
+    tokens: list[str], require_values: bool = True
 ) -> tuple[str, list[str]]:
     """
-    Parse command arguments, allowing spaces in keys and values.
+    Parse whitespace-split command tokens, allowing spaces in keys and values.
     Exactly how Unix command line arguments are parsed.
     """
 
-    # Split the command arguments
-    args = shlex.split(command_args)
+    # Tokens are split on whitespace, so a quoted or escaped key or value may
+    # span several
+    if any(char in token for token in tokens for char in "\"'\\"):
+        args = split_command_args(" ".join(tokens))
+    else:
+        args = tokens
 
     if len(args) < 1:
         raise ValueError("Missing key argument.")
@@ -62,9 +125,16 @@ def format_instruction_message(header: str, instructions: str) -> str:
     return f"*{header}*\n\n{instructions}"
 
 
+def format_bullet_list(items: list[str]) -> str:
+    """Standard format for a list of keys or values, one bullet per line."""
+    if not items:
+        return ""
+    return "- " + "\n- ".join(items)
+
+
 def handle_validation_error(e: ValueError) -> str:
     """Log and format validation errors."""
-    logging.error("Validation failed: %s", e)
+    logger.error("Validation failed: %s", e)
     return format_error_message(
         "Invalid input. Make sure your command matches the expected format."
     )
@@ -74,16 +144,14 @@ def handle_validation_error(e: ValueError) -> str:
 async def handle_add(repo: SqliteRepository, args: list[str]) -> str:
     """Handle the add command."""
     try:
-        command_args = " ".join(args[1:])
-        key, values = parse_command_args(command_args)
+        key, values = parse_command_args(args[1:])
     except ValueError as e:
         return format_error_message(str(e))
 
-    async with repo:
-        result = await repo.add(key, values)
+    result = await repo.add(key, values)
 
     if result.status == Status.OK:
-        values_formatted = "\n".join(f"- {v}" for v in values)
+        values_formatted = format_bullet_list(values)
         return format_success_message(
             "Values added successfully",
             f"*Key*\n```\n{key}\n```\n\n*Values*\n```\n{values_formatted}\n```",
@@ -94,8 +162,7 @@ async def handle_add(repo: SqliteRepository, args: list[str]) -> str:
 async def handle_get(repo: SqliteRepository, args: list[str]) -> str:
     """Handle the get command."""
     try:
-        command_args = " ".join(args[1:])
-        key, values = parse_command_args(command_args, require_values=False)
+        key, values = parse_command_args(args[1:], require_values=False)
     except ValueError as e:
         return format_error_message(str(e))
 
@@ -104,14 +171,13 @@ async def handle_get(repo: SqliteRepository, args: list[str]) -> str:
             "Only the values for a single key can be retrieved at a time."
         )
 
-    async with repo:
-        get_result = await repo.get(key)
-        search_result = await repo.search(key)
-        alike_keys = search_result.data
+    # The lookup and the suggestions don't depend on each other
+    get_result, search_result = await asyncio.gather(repo.get(key), repo.search(key))
+    alike_keys = search_result.data
 
     if get_result.status != Status.OK:
         if alike_keys:
-            keys_formatted = "\n".join(f"- {k}" for k in alike_keys)
+            keys_formatted = format_bullet_list(alike_keys)
             return format_error_message(
                 (
                     f"Values not found for key `{key}`. "
@@ -124,7 +190,7 @@ async def handle_get(repo: SqliteRepository, args: list[str]) -> str:
             )
         return format_error_message(f"Values not found for key `{key}`.")
 
-    values_formatted = "\n".join(f"- {v}" for v in get_result.data)
+    values_formatted = format_bullet_list(get_result.data)
     return format_success_message(
         "Get values",
         f"*Key*\n```\n{key}\n```\n\n*Values*\n```\n{values_formatted}\n```",
@@ -134,8 +200,7 @@ async def handle_get(repo: SqliteRepository, args: list[str]) -> str:
 async def handle_search(repo: SqliteRepository, args: list[str]) -> str:
     """Handle the search command."""
     try:
-        command_args = " ".join(args[1:])
-        key, values = parse_command_args(command_args, require_values=False)
+        key, values = parse_command_args(args[1:], require_values=False)
     except ValueError as e:
         return format_error_message(str(e))
 
@@ -143,13 +208,12 @@ async def handle_search(repo: SqliteRepository, args: list[str]) -> str:
     if values:
         return format_error_message("Only a single key can be searched at a time.")
 
-    async with repo:
-        result = await repo.search(key)
+    result = await repo.search(key)
 
     if not result.data:
         return format_error_message(f"No keys found similar to `{key}`.")
 
-    keys_formatted = "\n".join(f"- {k}" for k in result.data)
+    keys_formatted = format_bullet_list(result.data)
     return format_success_message(
         "Search results",
         f"*Keys*\n```\n{keys_formatted}\n```",
@@ -159,15 +223,13 @@ async def handle_search(repo: SqliteRepository, args: list[str]) -> str:
 async def handle_remove(repo: SqliteRepository, args: list[str]) -> str:
     """Handle the remove command."""
     try:
-        command_args = " ".join(args[1:])
-        key, values = parse_command_args(command_args)
+        key, values = parse_command_args(args[1:])
     except ValueError as e:
         return format_error_message(str(e))
 
-    async with repo:
-        result = await repo.remove(key, values)
+    result = await repo.remove(key, values)
 
-    values_formatted = "\n".join(f"- {v}" for v in values)
+    values_formatted = format_bullet_list(values)
 
     if result.status == Status.OK:
         return format_success_message(
@@ -187,13 +249,11 @@ async def handle_remove(repo: SqliteRepository, args: list[str]) -> str:
 async def handle_delete(repo: SqliteRepository, args: list[str]) -> str:
     """Handle the delete command."""
     try:
-        command_args = " ".join(args[1:])
-        key, _ = parse_command_args(command_args, require_values=False)
+        key, _ = parse_command_args(args[1:], require_values=False)
     except ValueError as e:
         return format_error_message(str(e))
 
-    async with repo:
-        result = await repo.delete(key)
+    result = await repo.delete(key)
 
     if result.status == Status.OK:
         return format_success_message(
@@ -205,104 +265,101 @@ async def handle_delete(repo: SqliteRepository, args: list[str]) -> str:
 
 async def handle_list(repo: SqliteRepository) -> str:
     """Handle the list command."""
-    async with repo:
-        result = await repo.list_keys()
+    result = await repo.list_keys()
 
     if not result.data:
         return format_error_message("No keys found.")
 
-    keys_formatted = "\n".join(f"- {k}" for k in result.data)
+    keys_formatted = format_bullet_list(result.data)
     return format_success_message(
         "List 10 random keys", f"*Keys*\n```\n{keys_formatted}\n```"
     )
 
 
+# Command dispatch table
+type Handler = Callable[[SqliteRepository, list[str]], Awaitable[str]]
+
+# Keyed on the plain string values so lookups never go through the enum
+_DISPATCH: dict[str, Handler] = {
+    Commands.ADD.value: handle_add,
+    Commands.GET.value: handle_get,
+    Commands.SEARCH.value: handle_search,
+    Commands.REMOVE.value: handle_remove,
+    Commands.DELETE.value: handle_delete,
+    Commands.LIST.value: lambda repo, _: handle_list(repo),
+}
+
+
+# Static responses, formatted once at import time
+_INSTRUCTIONS = (
+    "1. *Add a key with values*\n"
+    "```\n"
+    "- /acro add <key> <val1> <val2> ...\n"
+    '- /acro add "key with spaces" <val1> <val2> ...\n'
+    '- /acro add <key> "value with spaces"\n\n'
+    "Just like how Unix parses command line arguments."
+    "```\n\n"
+    "2. *Retrieve values for a key*\n"
+    "```\n"
+    "- /acro get <key>\n"
+    '- /acro get "key with spaces"\n'
+    "```\n\n"
+    "3. *Remove specific values*\n"
+    "```\n"
+    "- /acro remove <key> <val1> <val2> ...\n"
+    '- /acro remove "key with spaces" <val1> <val2> ...\n'
+    "```\n\n"
+    "4. *Delete a key*\n"
+    "```\n"
+    "- /acro delete <key>\n"
+    '- /acro delete "key with spaces"\n'
+    "```\n\n"
+    "5. *List a few random keys*\n"
+    "```\n"
+    "- /acro list\n"
+    "```\n\n"
+    "6. *Fuzzy search across all keys and values*\n"
+    "```\n"
+    "- /acro search <key>\n"
+    '- /acro search "key with spaces"\n'
+    "- /acro search <value>\n"
+    "```\n\n"
+)
+
+_INSTRUCTION_MSG = format_instruction_message(
+    "🤖 Acrobot - avoid acronym acrobatics!", _INSTRUCTIONS
+)
+_ERR_UNKNOWN_CMD = format_error_message(f"Unknown command.\n\n{_INSTRUCTIONS}")
+_ERR_UNEXPECTED = format_error_message(
+    "An unexpected error occurred. Please try again later."
+)
+
+
 # Main Bot Command Handler
 async def acrobot(
-    update: Update, context: ContextTypes.DEFAULT_TYPE
+    update: Update, context: ContextTypes.DEFAULT_TYPE, *, repo: SqliteRepository
 ) -> None:  # pragma: no cover
-    """Handle Acrobot commands."""
+    """
+    Handle Acrobot commands.
+    The repository is bound at registration time with `functools.partial`.
+    """
     if not update.message:
-        logging.debug("Received an update with no message.")
+        logger.debug("Received an update with no message.")
         return
 
-    instructions = (
-        "1. *Add a key with values*\n"
-        "```\n"
-        "- /acro add <key> <val1> <val2> ...\n"
-        '- /acro add "key with spaces" <val1> <val2> ...\n'
-        '- /acro add <key> "value with spaces"\n\n'
-        "Just like how Unix parses command line arguments."
-        "```\n\n"
-        "2. *Retrieve values for a key*\n"
-        "```\n"
-        "- /acro get <key>\n"
-        '- /acro get "key with spaces"\n'
-        "```\n\n"
-        "3. *Remove specific values*\n"
-        "```\n"
-        "- /acro remove <key> <val1> <val2> ...\n"
-        '- /acro remove "key with spaces" <val1> <val2> ...\n'
-        "```\n\n"
-        "4. *Delete a key*\n"
-        "```\n"
-        "- /acro delete <key>\n"
-        '- /acro delete "key with spaces"\n'
-        "```\n\n"
-        "5. *List a few random keys*\n"
-        "```\n"
-        "- /acro list\n"
-        "```\n\n"
-        "6. *Fuzzy search across all keys and values*\n"
-        "```\n"
-        "- /acro search <key>\n"
-        '- /acro search "key with spaces"\n'
-        "- /acro search <value>\n"
-        "```\n\n"
-    )
-
     if not context.args or len(context.args) < 1:
-        await update.message.reply_text(
-            format_instruction_message(
-                "🤖 Acrobot - avoid acronym acrobatics!", instructions
-            ),
-            parse_mode=ParseMode.MARKDOWN,
-        )
+        await update.message.reply_text(_INSTRUCTION_MSG, parse_mode=ParseMode.MARKDOWN)
         return
 
-    command = context.args[0].lower()
-    repo: SqliteRepository = context.bot_data.get("repo")
-
-    if not repo:
-        await update.message.reply_text(
-            format_error_message("Repository not initialized."),
-            parse_mode=ParseMode.MARKDOWN,
-        )
+    # Reject unknown commands before touching the repository
+    handler = _DISPATCH.get(context.args[0].lower())
+    if not handler:
+        await update.message.reply_text(_ERR_UNKNOWN_CMD, parse_mode=ParseMode.MARKDOWN)
         return
 
     try:
-        match command:
-            case Commands.ADD:
-                response = await handle_add(repo, context.args)
-            case Commands.GET:
-                response = await handle_get(repo, context.args)
-            case Commands.SEARCH:
-                response = await handle_search(repo, context.args)
-            case Commands.REMOVE:
-                response = await handle_remove(repo, context.args)
-            case Commands.DELETE:
-                response = await handle_delete(repo, context.args)
-            case Commands.LIST:
-                response = await handle_list(repo)
-            case _:
-                response = format_error_message(f"Unknown command.\n\n{instructions}")
-
+        response = await handler(repo, context.args)
         await update.message.reply_text(response, parse_mode=ParseMode.MARKDOWN)
     except Exception:
-        logging.exception("An error occurred while processing the command.")
-        await update.message.reply_text(
-            format_error_message(
-                "An unexpected error occurred. Please try again later."
-            ),
-            parse_mode=ParseMode.MARKDOWN,
-        )
+        logger.exception("An error occurred while processing the command.")
+        await update.message.reply_text(_ERR_UNEXPECTED, parse_mode=ParseMode.MARKDOWN)
@@ -1,5 +1,6 @@
 """Settings"""
 
+import functools
 import os
 from enum import StrEnum
 
@@ -15,15 +16,20 @@ class Env(StrEnum):
 class Settings(BaseSettings):
     turso_database_url: str = ""
     turso_auth_token: str = ""
+    turso_use_http: bool = False
     telegram_bot_token: str = ""
     logfire_token: str = ""
+    db_read_pool_size: int = 4
+    cache_size: int = 512
+    db_write_batch_window: float = 0.005
+    list_keys_ttl: float = 5.0
 
 
 def create_settings(env: Env | None = None) -> Settings:
     """Create settings instance with appropriate environment configuration."""
 
-    # Load environment variables from .env file
-    load_dotenv()
+    # Load the .env file first, since it may be what sets 'environment'
+    _load_env()
 
     # Read the 'environment' variable
     environment = os.environ.get("ENVIRONMENT", env)
@@ -32,12 +38,27 @@ def create_settings(env: Env | None = None) -> Settings:
     assert environment is not None, "Environment not set"
     assert environment in Env, f"Invalid environment: {environment}"
 
+    return _create_settings(Env(environment))
+
+
+@functools.cache
+def _load_env() -> None:
+    """Load environment variables from the .env file once."""
+    load_dotenv()
+
+
+@functools.lru_cache(maxsize=len(Env))
+def _create_settings(environment: Env) -> Settings:
+    """Build the settings for an environment once and reuse them afterwards."""
+
     # Build the settings configuration based on the environment
     config = SettingsConfigDict(
         env_prefix=f"{environment.upper()}_",
         env_file=".env",
         ignore_empty_file=True,
         extra="ignore",
+        frozen=True,
+        validate_default=False,
     )
 
     # Create a new settings class with the configuration
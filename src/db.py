@@ -1,36 +1,141 @@
 """Database initialization and client management."""
 
+import asyncio
+import functools
 import logging
 import pathlib
+import re
 
 import libsql_client
-import sqlparse
 
 from src import settings
 
 logger = logging.getLogger("acrobot.db")
 
+# The shared client, created lazily so that connection setup is paid only once
+_client: libsql_client.Client | None = None
+_client_lock = asyncio.Lock()
+
+
+# Tokens that matter for splitting: strings and comments (skipped whole, so a `;`
+# inside them never splits), block keywords of trigger bodies, and semicolons
+_SQL_TOKEN_RE = re.compile(
+    r"""
+    '(?:[^']|'')*'
+    | "(?:[^"]|"")*"
+    | --[^\n]*
+    | /\*.*?\*/
+    | \b(?P<keyword>BEGIN|CASE|END|TRIGGER)\b
+    | (?P<semicolon>;)
+    """,
+    re.DOTALL | re.IGNORECASE | re.VERBOSE,
+)
+_SQL_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def split_sql(sql: str) -> list[str]:
+    """
+    Split a SQL script into statements on top-level semicolons.
+    Semicolons inside strings, comments and trigger bodies don't split.
+    """
+
+    stmts: list[str] = []
+    start = 0
+    in_trigger = False
+    depth = 0
+
+    for match in _SQL_TOKEN_RE.finditer(sql):
+        keyword = match["keyword"]
+        if keyword:
+            keyword = keyword.upper()
+            if keyword == "TRIGGER":
+                in_trigger = True
+            elif in_trigger and keyword in ("BEGIN", "CASE"):
+                depth += 1
+            elif in_trigger and keyword == "END":
+                depth -= 1
+            continue
+
+        if match["semicolon"] and depth == 0:
+            stmts.append(sql[start : match.end()].strip())
+            start = match.end()
+            in_trigger = False
+
+    # The last statement may lack a semicolon
+    stmts.append(sql[start:].strip())
+
+    # Drop fragments that hold nothing but comments and stray semicolons
+    return [stmt for stmt in stmts if _SQL_COMMENT_RE.sub("", stmt).strip("; \t\r\n")]
+
+
+@functools.lru_cache(maxsize=8)
+def _load_ddl_statements(path: pathlib.Path) -> tuple[str, ...]:
+    """Read and split a DDL file once, reusing the statements afterwards."""
+    with open(path) as ddl_stream:
+        ddl = ddl_stream.read()
+
+    return tuple(split_sql(ddl))
+
 
 async def init_db(url: str, token: str, sql_dir: str) -> None:
     """Initialize the database schema."""
-    sql_dir = pathlib.Path(sql_dir)
-
     async with libsql_client.create_client(url, auth_token=token) as client:
-        with open(sql_dir / "ddl.sql") as ddl_stream:
-            ddl = ddl_stream.read()
+        # Remote clients start connecting on creation, so read the DDL off the
+        # event loop while the handshake is in flight
+        stmts = await asyncio.to_thread(
+            _load_ddl_statements, pathlib.Path(sql_dir) / "ddl.sql"
+        )
 
-        for stmt in sqlparse.split(ddl):
-            await client.execute(stmt)
+        # Local files get WAL so writers stop blocking readers. The file client opens
+        # a new connection per call, so only this persistent pragma sticks, and it
+        # can't run inside the batch's transaction
+        if url.startswith("file:"):
+            await client.execute("PRAGMA journal_mode=WAL")
+
+        # Send the whole schema as one atomic batch instead of a round trip each
+        await client.batch(list(stmts))
         logger.info("Database initialized...")
 
 
-async def get_db_client() -> libsql_client.Client:
+def _client_url(url: str) -> str:
     """
-    Get a global database client, creating a new one if necessary.
-
-    Ensures that a valid and open client is always returned.
+    Point `libsql://` URLs at Turso's HTTP endpoint when HTTP is preferred.
+    The HTTP client skips the WebSocket handshake and reuses one keep-alive session.
     """
+    if settings.turso_use_http and url.startswith("libsql://"):
+        return f"https://{url.removeprefix('libsql://')}"
+    return url
+
 
+def create_db_client() -> libsql_client.Client:
+    """Create a new database client that the caller owns and must close."""
     return libsql_client.create_client(
-        settings.turso_database_url, auth_token=settings.turso_auth_token
+        _client_url(settings.turso_database_url),
+        auth_token=settings.turso_auth_token,
     )
+
+
+async def get_db_client() -> libsql_client.Client:
+    """
+    Get the global database client, creating a new one if necessary.
+
+    Ensures that a valid and open client is always returned. The client is shared
+    across callers, so close it with `close_db_client` rather than directly.
+    """
+
+    global _client
+
+    async with _client_lock:
+        if _client is None or _client.closed:
+            _client = create_db_client()
+        return _client
+
+
+async def close_db_client() -> None:
+    """Close the global database client if one is open."""
+    global _client
+
+    async with _client_lock:
+        if _client is not None:
+            await _client.close()
+            _client = None
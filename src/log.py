@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 
@@ -6,9 +7,16 @@ import logfire
 from src import settings
 from src.conf import Env
 
+# Shared by every configured handler instead of being rebuilt on each call
+_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
 
+
+@functools.cache
 def configure_logger(level: int = logging.INFO) -> logging.Logger:
-    """Configure a custom logger."""
+    """Configure a custom logger once per level, reusing it afterwards."""
 
     # Create logfire handler
     environment = os.environ.get("ENVIRONMENT", None)
@@ -24,25 +32,25 @@ def configure_logger(level: int = logging.INFO) -> logging.Logger:
     logfire_handler = logfire.LogfireLoggingHandler()
     logfire_handler.setLevel(level)
 
-    # Create a formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    logfire_handler.setFormatter(formatter)
+    logfire_handler.setFormatter(_FORMATTER)
+
+    # Skip the thread and process lookups made for every record; nothing reads them
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
     # Configure httpx logger
     httpx_logger = logging.getLogger("httpx")
     httpx_logger.setLevel(logging.WARNING)
 
-    if not httpx_logger.hasHandlers():
+    if not httpx_logger.handlers:
         httpx_logger.addHandler(logfire_handler)
     httpx_logger.propagate = False
 
     # Configure acrobot logger
     logger = logging.getLogger("acrobot")
     logger.setLevel(level)
-    if not logger.hasHandlers():
+    if not logger.handlers:
         logger.addHandler(logfire_handler)
     logger.propagate = False
 
@@ -4,12 +4,14 @@ import asyncio
 import logging
 import os
 import signal
+from contextlib import AsyncExitStack
+from functools import partial
 
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 
 from src import settings
 from src.cmds import acrobot
-from src.db import init_db
+from src.db import close_db_client, init_db
 from src.log import configure_logger
 from src.repo import SqliteRepository
 
@@ -20,11 +22,12 @@ async def setup_application(repo: SqliteRepository) -> Application:
     """Setup the bot application with handlers and data."""
     application = Application.builder().token(settings.telegram_bot_token).build()
 
-    application.bot_data["repo"] = repo
+    # Bind the repository to the handler instead of looking it up per update
+    handler = partial(acrobot, repo=repo)
 
     # Add command and message handlers
-    application.add_handler(CommandHandler("acro", acrobot))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, acrobot))
+    application.add_handler(CommandHandler("acro", handler))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handler))
     return application
 
 
@@ -36,39 +39,53 @@ async def run_bot() -> None:
         settings.turso_auth_token,
         "sql/",
     )
-    repo = SqliteRepository()
+    async with AsyncExitStack() as stack:
+        # Close the shared client last, even when startup fails
+        stack.push_async_callback(close_db_client)
+
+        # Open the repository once on the shared client and reuse it across commands
+        repo = await stack.enter_async_context(
+            SqliteRepository(
+                read_pool_size=settings.db_read_pool_size,
+                cache_size=settings.cache_size,
+                write_batch_window=settings.db_write_batch_window,
+                list_keys_ttl=settings.list_keys_ttl,
+            )
+        )
+
+        # Setup application
+        application: Application = await setup_application(repo)
+
+        # Graceful shutdown with asyncio.Event
+        stop_event = asyncio.Event()
+
+        def stop_loop() -> None:
+            logger.info("Shutdown signal received.")
+            stop_event.set()
+
+        # Handle signals on the event loop thread rather than interrupting an await
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, stop_loop)
+        loop.add_signal_handler(signal.SIGTERM, stop_loop)
 
-    # Setup application
-    application: Application = await setup_application(repo)
-
-    # Graceful shutdown with asyncio.Event
-    stop_event = asyncio.Event()
-
-    def stop_loop(*_: object) -> None:
-        logger.info("Shutdown signal received.")
-        stop_event.set()
-
-    signal.signal(signal.SIGINT, stop_loop)
-    signal.signal(signal.SIGTERM, stop_loop)
-
-    try:
-        await application.initialize()
-        await application.start()
-        await application.updater.start_polling()
-        logger.info("Bot is running...")
-        await stop_event.wait()
-    finally:
-        logger.info("Shutting down the bot...")
         try:
-            # Stop the updater before stopping the application
-            if application.updater.running:
-                await application.updater.stop()
-            await application.stop()
-        except Exception as e:
-            logger.error(f"Error during shutdown: {e}")
+            await application.initialize()
+            await application.start()
+            await application.updater.start_polling()
+            logger.info("Bot is running...")
+            await stop_event.wait()
         finally:
-            await application.shutdown()  # Clean up resources
-            logger.info("Bot shut down gracefully.")
+            logger.info("Shutting down the bot...")
+            try:
+                # Stop the updater before stopping the application
+                if application.updater.running:
+                    await application.updater.stop()
+                await application.stop()
+            except Exception as e:
+                logger.error(f"Error during shutdown: {e}")
+            finally:
+                await application.shutdown()  # Clean up resources
+                logger.info("Bot shut down gracefully.")
 
 
 def main() -> None:
@@ -1,11 +1,95 @@
-from dataclasses import dataclass
+import asyncio
+import functools
+import itertools
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from enum import StrEnum
 from types import TracebackType
-from typing import Protocol, Self
+from typing import NamedTuple, Protocol, Self
 
 import libsql_client
 
-from src.db import get_db_client
+from src.batcher import WriteBatcher
+from src.cache import LRUCache, TTLCache
+from src.db import create_db_client, get_db_client
+
+# SQL for the hot paths, built once instead of on every call
+_GET_SQL = "SELECT val FROM acro_kvs WHERE key = ?"
+# Walk the rowid index from a random start, wrapping around to the beginning,
+# instead of sorting every row by RANDOM()
+_LIST_KEYS_SQL = """
+WITH start(rowid) AS MATERIALIZED (
+    SELECT ABS(RANDOM()) % MAX(rowid) + 1 FROM acro_kvs
+)
+SELECT DISTINCT key FROM (
+    SELECT * FROM (
+        SELECT key FROM acro_kvs
+        WHERE rowid >= (SELECT rowid FROM start)
+        ORDER BY rowid
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT key FROM acro_kvs
+        WHERE rowid < (SELECT rowid FROM start)
+        ORDER BY rowid
+    )
+)
+LIMIT 10
+"""
+# Keys and values are matched by separate queries so that both can run at once
+_SEARCH_KEY_SQL = """
+SELECT acro_kvs.key, acro_kvs_fts.rank
+FROM acro_kvs_fts
+JOIN acro_kvs ON acro_kvs.rowid = acro_kvs_fts.rowid
+WHERE acro_kvs_fts.key MATCH ?
+ORDER BY acro_kvs_fts.rank
+LIMIT 10
+"""
+_SEARCH_VAL_SQL = """
+SELECT acro_kvs.key, acro_kvs_fts.rank
+FROM acro_kvs_fts
+JOIN acro_kvs ON acro_kvs.rowid = acro_kvs_fts.rowid
+WHERE acro_kvs_fts.val MATCH ?
+ORDER BY acro_kvs_fts.rank
+LIMIT 10
+"""
+_DELETE_SQL = "DELETE FROM acro_kvs WHERE key = ?"
+_KEY_EXISTS_SQL = "SELECT EXISTS (SELECT 1 FROM acro_kvs WHERE key = ?)"
+
+# Values arrive as one JSON array, so the statement stays the same for any count;
+# nothing is deleted unless every value is present
+_REMOVE_SQL = """
+DELETE FROM acro_kvs
+WHERE key = ?1
+    AND val IN (SELECT value FROM json_each(?2))
+    AND (
+        SELECT COUNT(*) FROM acro_kvs
+        WHERE key = ?1 AND val IN (SELECT value FROM json_each(?2))
+    ) = (SELECT COUNT(*) FROM json_each(?2))
+"""
+
+# Stay under SQLite's historical limit on bound parameters per statement
+_MAX_PARAMS = 999
+
+
+@functools.lru_cache(maxsize=64)
+def _insert_sql(rows: int) -> str:
+    """Build the multi-row insert for a number of rows once and reuse it afterwards."""
+    return (
+        "INSERT OR IGNORE INTO acro_kvs (key, val) VALUES "
+        f"{', '.join(['(?, ?)'] * rows)}"
+    )
+
+
+def _fts_query(term: str) -> str:
+    """
+    Quote each whitespace-separated word of a search term as an FTS5 phrase.
+    The phrases are implicitly ANDed, as the words of an unquoted query are,
+    while operator characters like `-`, `*`, `:` or parentheses match literally
+    instead of being parsed as query syntax.
+    """
+    return " ".join(f'"{word.replace('"', '""')}"' for word in term.split())
 
 
 class Status(StrEnum):
@@ -14,8 +98,7 @@ class Status(StrEnum):
     NO_VALUES = "no_values"
 
 
-@dataclass(frozen=True, slots=True)
-class Result[T]:
+class Result[T](NamedTuple):
     """Represents the result of a repository operation."""
 
     status: Status
@@ -53,17 +136,60 @@ class Repository(Protocol):
 class SqliteRepository(Repository):
     """SQLite-backed repository for managing key-value data."""
 
-    def __init__(self, db_client: libsql_client.Client | None = None) -> None:
+    def __init__(
+        self,
+        db_client: libsql_client.Client | None = None,
+        read_pool_size: int = 0,
+        cache_size: int = 0,
+        write_batch_window: float = 0,
+        list_keys_ttl: float = 0,
+    ) -> None:
         """
         Initialize the repository with an optional database client.
-        If no client is provided, it will be created on entering the context.
+        If no client is provided, the shared client is used on entering the context.
+        A provided client is closed on exit while the shared one is left open.
+
+        When `read_pool_size` is positive, that many extra clients are opened on
+        entering the context and reads are spread across them, so concurrent
+        lookups don't queue up behind each other or behind writes.
+
+        When `cache_size` is positive, `get` and `search` results are kept in
+        LRU caches of that size. Writes invalidate the affected entries.
+        Concurrent `get` calls for the same key share a single query either way.
+
+        When `write_batch_window` is positive, writes issued within that many
+        seconds of each other are committed together in a single round trip.
+
+        When `list_keys_ttl` is positive, the random sample returned by
+        `list_keys` is reused for that many seconds. Writes invalidate it.
         """
         self._client = db_client
+        self._shared_client = False
+        self._read_pool_size = read_pool_size
+        self._read_clients: list[libsql_client.Client] = []
+        self._idle_readers: asyncio.Queue[libsql_client.Client] = asyncio.Queue()
+        self._get_cache: LRUCache[str, Result[list[str]]] = LRUCache(cache_size)
+        self._search_cache: LRUCache[str, Result[list[str]]] = LRUCache(cache_size)
+        self._keys_cache: TTLCache[Result[list[str]]] = TTLCache(list_keys_ttl)
+        self._pending_gets: dict[str, asyncio.Task[Result[list[str]]]] = {}
+        self._generation = 0
+        self._write_batch_window = write_batch_window
+        self._batcher: WriteBatcher | None = None
 
     async def __aenter__(self) -> Self:
-        """Initialize the database client if not already set."""
+        """Initialize the database clients if not already set."""
         if self._client is None:
             self._client = await get_db_client()
+            self._shared_client = True
+
+        while len(self._read_clients) < self._read_pool_size:
+            reader = create_db_client()
+            self._read_clients.append(reader)
+            self._idle_readers.put_nowait(reader)
+
+        if self._write_batch_window > 0 and self._batcher is None:
+            self._batcher = WriteBatcher(self._client, self._write_batch_window)
+            self._batcher.start()
         return self
 
     async def __aexit__(
@@ -72,36 +198,121 @@ class SqliteRepository(Repository):
         exc_value: BaseException | None,
         traceback: TracebackType | None,
     ) -> None:
-        """Close the database client if it was created during the context."""
-        if self._client:
+        """Close the readers, and the database client unless it's shared."""
+        if self._batcher:
+            await self._batcher.close()
+            self._batcher = None
+
+        for reader in self._read_clients:
+            await reader.close()
+        self._read_clients = []
+        self._idle_readers = asyncio.Queue()
+
+        if self._client and not self._shared_client:
             await self._client.__aexit__(exc_type, exc_value, traceback)
-            self._client = None
+        self._client = None
+        self._shared_client = False
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[libsql_client.Client]:
+        """Borrow a client for a read, falling back to the main client."""
+        assert isinstance(self._client, libsql_client.Client), "Client not initialized"
+
+        if not self._read_clients:
+            yield self._client
+            return
+
+        reader = await self._idle_readers.get()
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    async def _write(
+        self, stmts: list[libsql_client.Statement]
+    ) -> list[libsql_client.ResultSet]:
+        """
+        Run write statements atomically, through the batcher if enabled.
+        Returns the result set of each statement.
+        """
+        assert isinstance(self._client, libsql_client.Client), "Client not initialized"
+
+        if self._batcher:
+            return await self._batcher.submit(stmts)
+
+        if len(stmts) == 1:
+            return [await self._client.execute(stmts[0])]
+
+        # One atomic round trip instead of one per statement inside a transaction
+        return await self._client.batch(stmts)
+
+    def _invalidate(self, key: str) -> None:
+        """Drop cached results that a write to `key` may have made stale."""
+        # Reads already in flight may have missed the write, so keep them from
+        # caching their results or being joined by later callers
+        self._generation += 1
+        self._pending_gets.pop(key, None)
+        self._get_cache.pop(key)
+        self._search_cache.clear()
+        self._keys_cache.clear()
 
     async def get(self, key: str) -> Result[list[str]]:
         """Retrieve the list of values associated with the given key."""
         assert isinstance(self._client, libsql_client.Client), "Client not initialized"
 
-        query = libsql_client.Statement(
-            "SELECT val FROM acro_kvs WHERE key = ?", (key,)
-        )
-        result_set = await self._client.execute(query)
+        cached = self._get_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Join an identical lookup that is already running instead of issuing another
+        task = self._pending_gets.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_values(key))
+            self._pending_gets[key] = task
+            task.add_done_callback(lambda done: self._forget_get(key, done))
+
+        # Shield so that one cancelled caller doesn't cancel the lookup for the rest
+        return await asyncio.shield(task)
 
+    def _forget_get(self, key: str, task: asyncio.Task[Result[list[str]]]) -> None:
+        """Stop routing callers to a finished lookup unless it was replaced."""
+        if self._pending_gets.get(key) is task:
+            del self._pending_gets[key]
+
+    async def _fetch_values(self, key: str) -> Result[list[str]]:
+        """Query the values of a key and cache them if no write intervened."""
+        generation = self._generation
+        async with self._reader() as client:
+            result_set = await client.execute(_GET_SQL, (key,))
+
+        result: Result[list[str]]
         if not result_set.rows:
-            return Result(status=Status.NO_KEY, data=[])
+            result = Result(status=Status.NO_KEY, data=[])
+        else:
+            data = [row["val"] for row in result_set.rows if row["val"]]
+            result = Result(status=Status.OK, data=data)
 
-        data = [row["val"] for row in result_set.rows if row["val"]]
-        return Result(status=Status.OK, data=data)
+        if generation == self._generation:
+            self._get_cache.set(key, result)
+        return result
 
     async def list_keys(self) -> Result[list[str]]:
         """Retrieve up to 10 random keys from the database."""
         assert isinstance(self._client, libsql_client.Client), "Client not initialized"
 
-        query = libsql_client.Statement(
-            "SELECT DISTINCT key FROM acro_kvs ORDER BY RANDOM() LIMIT 10"
-        )
-        result_set = await self._client.execute(query)
+        cached = self._keys_cache.get()
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        async with self._reader() as client:
+            result_set = await client.execute(_LIST_KEYS_SQL)
         data = [row["key"] for row in result_set.rows]
-        return Result(status=Status.OK, data=data)
+        result = Result(status=Status.OK, data=data)
+
+        if generation == self._generation:
+            self._keys_cache.set(result)
+        return result
 
     async def search(self, term: str) -> Result[list[str]]:
         """
@@ -110,33 +321,40 @@ class SqliteRepository(Repository):
         """
         assert isinstance(self._client, libsql_client.Client), "Client not initialized"
 
-        if not term:
+        # The trigram tokenizer can't match a word shorter than three characters
+        if all(len(word) < 3 for word in term.split()):
             return Result(status=Status.NO_KEY, data=[])
 
         term = term.lower()
-        query = libsql_client.Statement(
-            """
-            WITH ranked_rows AS (
-                SELECT rowid, rank
-                FROM acro_kvs_fts
-                WHERE key MATCH ? OR val MATCH ?
-                ORDER BY rank
-                LIMIT 10
-            )
-            SELECT DISTINCT acro_kvs.key
-            FROM acro_kvs
-            JOIN ranked_rows ON acro_kvs.rowid = ranked_rows.rowid
-            ORDER BY ranked_rows.rank ASC
-            """,
-            (term, term),
+        cached = self._search_cache.get(term)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        query = _fts_query(term)
+        key_rows, val_rows = await asyncio.gather(
+            self._search_rows(_SEARCH_KEY_SQL, query),
+            self._search_rows(_SEARCH_VAL_SQL, query),
         )
-        result_set = await self._client.execute(query)
 
-        data = [row["key"] for row in result_set.rows]
+        # Keep the 10 best-ranked rows across both queries, then dedup their keys
+        rows = sorted((*key_rows, *val_rows), key=lambda row: row["rank"])[:10]
+        data = list(dict.fromkeys(row["key"] for row in rows))
+        result: Result[list[str]]
         if not data:
-            return Result(status=Status.NO_KEY, data=[])
+            result = Result(status=Status.NO_KEY, data=[])
+        else:
+            result = Result(status=Status.OK, data=data)
+
+        if generation == self._generation:
+            self._search_cache.set(term, result)
+        return result
 
-        return Result(status=Status.OK, data=data)
+    async def _search_rows(self, sql: str, term: str) -> list[libsql_client.Row]:
+        """Run one of the search queries on its own reader."""
+        async with self._reader() as client:
+            result_set = await client.execute(sql, (term,))
+        return result_set.rows
 
     async def add(self, key: str, values: list[str]) -> Result[None]:
         """
@@ -148,67 +366,59 @@ class SqliteRepository(Repository):
         if not values:
             return Result(status=Status.NO_VALUES, data=None)
 
-        existing_result = await self.get(key)
-        existing_values = set(existing_result.data)
-
-        new_values = set(values) - existing_values
-        if not new_values:
-            return Result(status=Status.OK, data=None)
-
-        tx = self._client.transaction()
-        for val in new_values:
-            await tx.execute(
-                "INSERT INTO acro_kvs (key, val) VALUES (?, ?)", (key, val)
-            )
-        await tx.commit()
+        # Let the UNIQUE(key, val) constraint drop duplicates instead of reading first
+        # Large adds are split into several statements that still commit atomically
+        new_values = dict.fromkeys(values)
+        await self._write(
+            [
+                libsql_client.Statement(
+                    _insert_sql(len(chunk)),
+                    [arg for val in chunk for arg in (key, val)],
+                )
+                for chunk in itertools.batched(new_values, _MAX_PARAMS // 2)
+            ]
+        )
+        self._invalidate(key)
 
         return Result(status=Status.OK, data=None)
 
     async def remove(self, key: str, values: list[str]) -> Result[None]:
         """
         Remove specified values from the list associated with the given key.
-        If the list becomes empty, the key is deleted from the database.
+        If the list becomes empty, the key is no longer present in the database.
         """
         assert isinstance(self._client, libsql_client.Client), "Client not initialized"
 
         if not values:
             return Result(status=Status.NO_VALUES, data=None)
 
-        existing_result = await self.get(key)
-        if existing_result.status != Status.OK:
-            return Result(status=Status.NO_KEY, data=None)
-
-        existing_values = set(existing_result.data)
-        values_to_remove = set(values)
-
-        if not values_to_remove <= existing_values:
-            return Result(status=Status.NO_VALUES, data=None)
-
-        remaining_values = existing_values - values_to_remove
-
-        if not remaining_values:
-            await self.delete(key)
+        # Remove all of the values or none of them in a single statement, and check
+        # in the same round trip whether the key exists in case nothing matched
+        payload = json.dumps(list(dict.fromkeys(values)))
+        removed, exists = await self._write(
+            [
+                libsql_client.Statement(_REMOVE_SQL, (key, payload)),
+                libsql_client.Statement(_KEY_EXISTS_SQL, (key,)),
+            ]
+        )
+        if removed.rows_affected:
+            self._invalidate(key)
             return Result(status=Status.OK, data=None)
 
-        tx = self._client.transaction()
-        await tx.execute("DELETE FROM acro_kvs WHERE key = ?", (key,))
-        for val in remaining_values:
-            await tx.execute(
-                "INSERT INTO acro_kvs (key, val) VALUES (?, ?)", (key, val)
-            )
-        await tx.commit()
-
-        return Result(status=Status.OK, data=None)
+        if not exists.rows[0][0]:
+            return Result(status=Status.NO_KEY, data=None)
+        return Result(status=Status.NO_VALUES, data=None)
 
     async def delete(self, key: str) -> Result[None]:
         """Delete the specified key and all associated values."""
         assert isinstance(self._client, libsql_client.Client), "Client not initialized"
 
-        result = await self.get(key)
-        if result.status != Status.OK:
+        # The affected row count tells whether the key existed, so don't read first
+        (result_set,) = await self._write(
+            [libsql_client.Statement(_DELETE_SQL, (key,))]
+        )
+        if not result_set.rows_affected:
             return Result(status=Status.NO_KEY, data=None)
 
-        await self._client.execute(
-            libsql_client.Statement("DELETE FROM acro_kvs WHERE key = ?", (key,))
-        )
+        self._invalidate(key)
         return Result(status=Status.OK, data=None)
@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import libsql_client
+import pytest
+
+from src.batcher import WriteBatcher
+
+
+def make_stmt(val: str) -> libsql_client.Statement:
+    return libsql_client.Statement(
+        "INSERT INTO acro_kvs (key, val) VALUES (?, ?)", ("key1", val)
+    )
+
+
+@pytest.fixture
+def client_mock() -> AsyncMock:
+    """Fixture to create a mock libsql client."""
+    return AsyncMock(spec=libsql_client.Client)
+
+
+async def test_concurrent_submits_share_one_batch(client_mock: AsyncMock) -> None:
+    batcher = WriteBatcher(client_mock, window=0.01)
+    batcher.start()
+
+    stmt1, stmt2, stmt3 = make_stmt("value1"), make_stmt("value2"), make_stmt("value3")
+    await asyncio.gather(batcher.submit([stmt1]), batcher.submit([stmt2, stmt3]))
+    await batcher.close()
+
+    client_mock.batch.assert_awaited_once_with([stmt1, stmt2, stmt3])
+
+
+async def test_submit_returns_own_result_sets(client_mock: AsyncMock) -> None:
+    client_mock.batch.return_value = ["result1", "result2", "result3"]
+    batcher = WriteBatcher(client_mock, window=0.01)
+    batcher.start()
+
+    first, second = await asyncio.gather(
+        batcher.submit([make_stmt("value1")]),
+        batcher.submit([make_stmt("value2"), make_stmt("value3")]),
+    )
+    await batcher.close()
+
+    assert first == ["result1"]
+    assert second == ["result2", "result3"]
+
+
+async def test_failed_batch_is_retried_per_submission(client_mock: AsyncMock) -> None:
+    bad_stmt = make_stmt("bad")
+
+    async def batch(stmts: list[libsql_client.Statement]) -> list[None]:
+        if bad_stmt in stmts:
+            raise libsql_client.LibsqlError("constraint failed", "SQLITE_CONSTRAINT")
+        return [None] * len(stmts)
+
+    client_mock.batch.side_effect = batch
+    batcher = WriteBatcher(client_mock, window=0.01)
+    batcher.start()
+
+    results: list[object] = await asyncio.gather(
+        batcher.submit([make_stmt("value1")]),
+        batcher.submit([bad_stmt]),
+        return_exceptions=True,
+    )
+    good, bad = results
+    await batcher.close()
+
+    assert good == [None]
+    assert isinstance(bad, libsql_client.LibsqlError)
+    assert client_mock.batch.await_count == 3
+
+
+async def test_close_flushes_pending_writes(client_mock: AsyncMock) -> None:
+    batcher = WriteBatcher(client_mock, window=60)
+    batcher.start()
+
+    submit_task = asyncio.create_task(batcher.submit([make_stmt("value1")]))
+    await asyncio.sleep(0)
+    await batcher.close()
+
+    await submit_task
+    client_mock.batch.assert_awaited_once()
+
+
+async def test_submit_requires_running_batcher(client_mock: AsyncMock) -> None:
+    batcher = WriteBatcher(client_mock)
+
+    with pytest.raises(RuntimeError, match="Write batcher is not running"):
+        await batcher.submit([make_stmt("value1")])
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from src.cache import LRUCache, TTLCache
+
+
+def test_get_missing_key() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    assert cache.get("key1") is None
+
+
+def test_set_and_get() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.set("key1", 1)
+    assert cache.get("key1") == 1
+    assert "key1" in cache
+    assert len(cache) == 1
+
+
+def test_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.set("key1", 1)
+    cache.set("key2", 2)
+
+    # Touch key1 so that key2 becomes the eviction candidate
+    cache.get("key1")
+    cache.set("key3", 3)
+
+    assert "key1" in cache
+    assert "key2" not in cache
+    assert "key3" in cache
+
+
+def test_pop_and_clear() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.set("key1", 1)
+    cache.set("key2", 2)
+
+    cache.pop("key1")
+    cache.pop("missing")
+    assert "key1" not in cache
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_disabled_cache() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=0)
+    cache.set("key1", 1)
+    assert cache.get("key1") is None
+
+
+def test_ttl_cache_expires() -> None:
+    cache: TTLCache[int] = TTLCache(ttl=5.0)
+    assert cache.get() is None
+
+    with patch("src.cache.time.monotonic", return_value=100.0):
+        cache.set(1)
+        assert cache.get() == 1
+
+    with patch("src.cache.time.monotonic", return_value=105.0):
+        assert cache.get() is None
+
+
+def test_ttl_cache_clear() -> None:
+    cache: TTLCache[int] = TTLCache(ttl=5.0)
+    cache.set(1)
+    cache.clear()
+    assert cache.get() is None
+
+
+def test_disabled_ttl_cache() -> None:
+    cache: TTLCache[int] = TTLCache(ttl=0)
+    cache.set(1)
+    assert cache.get() is None
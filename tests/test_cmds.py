@@ -1,10 +1,15 @@
 # test_cmds.py
 
+import shlex
+from collections.abc import Awaitable, Callable
 from unittest.mock import AsyncMock
 
 import pytest
 
 from src.cmds import (
+    _DISPATCH,
+    Commands,
+    format_bullet_list,
     format_error_message,
     format_instruction_message,
     format_success_message,
@@ -16,44 +21,93 @@ from src.cmds import (
     handle_search,
     handle_validation_error,
     parse_command_args,
+    split_command_args,
 )
 from src.repo import Result, SqliteRepository, Status
 
 
 # Utility Functions Tests
 def test_parse_command_args_valid() -> None:
-    key, values = parse_command_args("key1 value1 value2")
+    key, values = parse_command_args(["key1", "value1", "value2"])
     assert key == "key1"
     assert values == ["value1", "value2"]
 
 
 def test_parse_command_args_with_spaces() -> None:
-    key, values = parse_command_args('"key with spaces" "value with spaces" value2')
+    key, values = parse_command_args(
+        '"key with spaces" "value with spaces" value2'.split()
+    )
     assert key == "key with spaces"
     assert values == ["value with spaces", "value2"]
 
 
 def test_parse_command_args_missing_key() -> None:
     with pytest.raises(ValueError, match="Missing key argument."):
-        parse_command_args("")
+        parse_command_args([])
 
 
 def test_parse_command_args_empty_key() -> None:
     with pytest.raises(ValueError, match="Key must be non-empty."):
-        parse_command_args('"" value1')
+        parse_command_args(['""', "value1"])
 
 
 def test_parse_command_args_require_values() -> None:
     with pytest.raises(ValueError, match="Values must not be empty."):
-        parse_command_args("key1")
+        parse_command_args(["key1"])
 
 
 def test_parse_command_args_not_require_values() -> None:
-    key, values = parse_command_args("key1", require_values=False)
+    key, values = parse_command_args(["key1"], require_values=False)
     assert key == "key1"
     assert values == []
 
 
+def test_parse_command_args_unbalanced_quote() -> None:
+    with pytest.raises(ValueError, match="No closing quotation."):
+        parse_command_args(['"key1', "value1"])
+
+
+@pytest.mark.parametrize(
+    ("tokens", "expected"),
+    [
+        (["key\\", "one", "value\\", "two"], ("key one", ["value two"])),
+        (["C:\\path", "v"], ("C:path", ["v"])),
+        (["C:\\path", '"v', 'w"'], ("C:path", ["v w"])),
+        (["C:\\\\path", "v"], ("C:\\path", ["v"])),
+    ],
+)
+def test_parse_command_args_backslash_escapes(
+    tokens: list[str], expected: tuple[str, list[str]]
+) -> None:
+    assert parse_command_args(tokens) == expected
+
+
+@pytest.mark.parametrize(
+    ("command_args", "expected"),
+    [
+        ("key1 value1", ["key1", "value1"]),
+        ("  key1   value1  ", ["key1", "value1"]),
+        ("'key with spaces' value1", ["key with spaces", "value1"]),
+        ('key"with"quotes value1', ["keywithquotes", "value1"]),
+        ('"" value1', ["", "value1"]),
+        ("", []),
+        (r"key\ with\ spaces value1", ["key with spaces", "value1"]),
+        (r"key1 \"quoted\"", ["key1", '"quoted"']),
+        (r'"say \"hi\"" value1', ['say "hi"', "value1"]),
+        (r'"back\\slash \n" value1', [r"back\slash \n", "value1"]),
+        (r"'no \escape' value1", [r"no \escape", "value1"]),
+    ],
+)
+def test_split_command_args(command_args: str, expected: list[str]) -> None:
+    assert split_command_args(command_args) == expected
+    assert split_command_args(command_args) == shlex.split(command_args)
+
+
+def test_split_command_args_trailing_backslash() -> None:
+    with pytest.raises(ValueError, match="No escaped character."):
+        split_command_args("key1 value1\\")
+
+
 def test_format_error_message() -> None:
     error_message = format_error_message("An error occurred.")
     assert error_message == "❌ *Error*: An error occurred."
@@ -69,6 +123,11 @@ def test_format_instruction_message() -> None:
     assert instruction_message == "*Instructions*\n\nDo this."
 
 
+def test_format_bullet_list() -> None:
+    assert format_bullet_list(["value1", "value2"]) == "- value1\n- value2"
+    assert format_bullet_list([]) == ""
+
+
 def test_handle_validation_error(caplog: pytest.LogCaptureFixture) -> None:
     error = ValueError("Invalid input.")
     message = handle_validation_error(error)
@@ -79,11 +138,17 @@ def test_handle_validation_error(caplog: pytest.LogCaptureFixture) -> None:
 
 
 # Command Handlers Tests
+@pytest.fixture(scope="module")
+def shared_repo_mock() -> AsyncMock:
+    """Fixture to build the mock repository once for the whole module."""
+    return AsyncMock(spec=SqliteRepository)
+
+
 @pytest.fixture
-def repo_mock() -> SqliteRepository:
-    """Fixture to create a mock repository."""
-    repo = AsyncMock(spec=SqliteRepository)
-    return repo
+def repo_mock(shared_repo_mock: AsyncMock) -> AsyncMock:
+    """Fixture to hand each test the shared mock repository in a clean state."""
+    shared_repo_mock.reset_mock(return_value=True, side_effect=True)
+    return shared_repo_mock
 
 
 @pytest.fixture
@@ -97,34 +162,42 @@ def create_result(status: Status, data: list[str] | None) -> Result:
     return Result(status=status, data=data)
 
 
-# Tests for handle_add
-async def test_handle_add_success(repo_mock: AsyncMock) -> None:
-    repo_mock.add.return_value = create_result(Status.OK, None)
-
-    response = await handle_add(repo_mock, ["add", "key1", "value1", "value2"])
-    expected_response = format_success_message(
-        "Values added successfully",
-        "*Key*\n```\nkey1\n```\n\n*Values*\n```\n- value1\n- value2\n```",
-    )
-    assert response == expected_response
-    repo_mock.add.assert_awaited_once_with("key1", ["value1", "value2"])
-
-
-async def test_handle_add_missing_key(repo_mock: AsyncMock) -> None:
-    response = await handle_add(repo_mock, ["add"])
-    assert response == format_error_message("Missing key argument.")
-
-
-async def test_handle_add_no_values(repo_mock: AsyncMock) -> None:
-    response = await handle_add(repo_mock, ["add", "key1"])
-    assert response == format_error_message("Values must not be empty.")
-
-
-async def test_handle_add_failure(repo_mock: AsyncMock) -> None:
-    repo_mock.add.return_value = create_result(Status.NO_VALUES, None)
-
-    response = await handle_add(repo_mock, ["add", "key1", "value1"])
-    assert response == format_error_message("Failed to add values for key `key1`.")
+# Tests for argument validation shared by the handlers
+INVALID_ARGS = [
+    (handle_add, ["add"], "Missing key argument."),
+    (handle_add, ["add", "key1"], "Values must not be empty."),
+    (
+        handle_get,
+        ["get", "key1", "value1"],
+        "Only the values for a single key can be retrieved at a time.",
+    ),
+    (handle_get, ["get"], "Missing key argument."),
+    (
+        handle_search,
+        ["search", "key1", "key2"],
+        "Only a single key can be searched at a time.",
+    ),
+    (handle_search, ["search"], "Missing key argument."),
+    (handle_remove, ["remove", "key1"], "Values must not be empty."),
+    (handle_remove, ["remove"], "Missing key argument."),
+    (handle_delete, ["delete"], "Missing key argument."),
+]
+
+
+@pytest.mark.parametrize(
+    ("handler", "args", "error"),
+    INVALID_ARGS,
+    ids=[" ".join(args) for _, args, _ in INVALID_ARGS],
+)
+async def test_handle_invalid_args(
+    repo_mock: AsyncMock,
+    handler: Callable[[AsyncMock, list[str]], Awaitable[str]],
+    args: list[str],
+    error: str,
+) -> None:
+    response = await handler(repo_mock, args)
+    assert response == format_error_message(error)
+    assert not repo_mock.mock_calls
 
 
 # Tests for handle_get
@@ -167,116 +240,113 @@ async def test_handle_get_key_not_found_with_alike(repo_mock: AsyncMock) -> None
     repo_mock.search.assert_awaited_once_with("key1")
 
 
-async def test_handle_get_with_extra_values(repo_mock: AsyncMock) -> None:
-    response = await handle_get(repo_mock, ["get", "key1", "value1"])
-    assert response == format_error_message(
-        "Only the values for a single key can be retrieved at a time."
-    )
-
-
-async def test_handle_get_missing_key(repo_mock: AsyncMock) -> None:
-    response = await handle_get(repo_mock, ["get"])
-    assert response == format_error_message("Missing key argument.")
-
-
-# Tests for handle_search
-async def test_handle_search_success(repo_mock: AsyncMock) -> None:
-    repo_mock.search.return_value = create_result(Status.OK, ["key1", "key2"])
-
-    response = await handle_search(repo_mock, ["search", "key"])
-    expected_response = format_success_message(
-        "Search results",
-        "*Keys*\n```\n- key1\n- key2\n```",
-    )
-    assert response == expected_response
-    repo_mock.search.assert_awaited_once_with("key")
-
-
-async def test_handle_search_no_matches(repo_mock: AsyncMock) -> None:
-    repo_mock.search.return_value = create_result(Status.NO_KEY, [])
-
-    response = await handle_search(repo_mock, ["search", "nonexistent"])
-    assert response == format_error_message("No keys found similar to `nonexistent`.")
-    repo_mock.search.assert_awaited_once_with("nonexistent")
-
-
-async def test_handle_search_extra_values(repo_mock: AsyncMock) -> None:
-    response = await handle_search(repo_mock, ["search", "key1", "key2"])
-    assert response == format_error_message(
-        "Only a single key can be searched at a time."
-    )
-
-
-async def test_handle_search_missing_key(repo_mock: AsyncMock) -> None:
-    response = await handle_search(repo_mock, ["search"])
-    assert response == format_error_message("Missing key argument.")
-
-
-# Tests for handle_remove
-async def test_handle_remove_success(repo_mock: AsyncMock) -> None:
-    repo_mock.remove.return_value = create_result(Status.OK, None)
-
-    response = await handle_remove(repo_mock, ["remove", "key1", "value1", "value2"])
-    expected_response = format_success_message(
-        "Values removed successfully",
-        "*Key*\n\n`key1`\n\n*Values*\n```\n- value1\n- value2\n```",
-    )
-    assert response == expected_response
-    repo_mock.remove.assert_awaited_once_with("key1", ["value1", "value2"])
-
-
-async def test_handle_remove_no_key(repo_mock: AsyncMock) -> None:
-    repo_mock.remove.return_value = create_result(Status.NO_KEY, None)
-
-    response = await handle_remove(repo_mock, ["remove", "key1", "value1"])
-    assert response == format_error_message("Key `key1` not found.")
-    repo_mock.remove.assert_awaited_once_with("key1", ["value1"])
-
-
-async def test_handle_remove_no_values(repo_mock: AsyncMock) -> None:
-    repo_mock.remove.return_value = create_result(Status.NO_VALUES, None)
-
-    response = await handle_remove(repo_mock, ["remove", "key1", "value1"])
-    expected_response = format_error_message(
-        "Values not found.\n\n*Key*\n```\nkey1\n```\n\n*Values*\n```\n- value1\n```"
-    )
-    assert response == expected_response
-    repo_mock.remove.assert_awaited_once_with("key1", ["value1"])
-
-
-async def test_handle_remove_missing_values(repo_mock: AsyncMock) -> None:
-    response = await handle_remove(repo_mock, ["remove", "key1"])
-    assert response == format_error_message("Values must not be empty.")
-
-
-async def test_handle_remove_missing_key(repo_mock: AsyncMock) -> None:
-    response = await handle_remove(repo_mock, ["remove"])
-    assert response == format_error_message("Missing key argument.")
-
-
-# Tests for handle_delete
-async def test_handle_delete_success(repo_mock: AsyncMock) -> None:
-    repo_mock.delete.return_value = create_result(Status.OK, None)
-
-    response = await handle_delete(repo_mock, ["delete", "key1"])
-    expected_response = format_success_message(
-        "Key deleted successfully", "*Key*\n```\nkey1\n```"
-    )
-    assert response == expected_response
-    repo_mock.delete.assert_awaited_once_with("key1")
-
-
-async def test_handle_delete_no_key(repo_mock: AsyncMock) -> None:
-    repo_mock.delete.return_value = create_result(Status.NO_KEY, None)
-
-    response = await handle_delete(repo_mock, ["delete", "key1"])
-    assert response == format_error_message("Key `key1` not found.")
-    repo_mock.delete.assert_awaited_once_with("key1")
-
-
-async def test_handle_delete_missing_key(repo_mock: AsyncMock) -> None:
-    response = await handle_delete(repo_mock, ["delete"])
-    assert response == format_error_message("Missing key argument.")
+# Tests for handlers that make a single repository call
+SINGLE_CALL_CASES = [
+    (
+        handle_add,
+        ["add", "key1", "value1", "value2"],
+        "add",
+        create_result(Status.OK, None),
+        ("key1", ["value1", "value2"]),
+        format_success_message(
+            "Values added successfully",
+            "*Key*\n```\nkey1\n```\n\n*Values*\n```\n- value1\n- value2\n```",
+        ),
+    ),
+    (
+        handle_add,
+        ["add", "key1", "value1"],
+        "add",
+        create_result(Status.NO_VALUES, None),
+        ("key1", ["value1"]),
+        format_error_message("Failed to add values for key `key1`."),
+    ),
+    (
+        handle_search,
+        ["search", "key"],
+        "search",
+        create_result(Status.OK, ["key1", "key2"]),
+        ("key",),
+        format_success_message("Search results", "*Keys*\n```\n- key1\n- key2\n```"),
+    ),
+    (
+        handle_search,
+        ["search", "nonexistent"],
+        "search",
+        create_result(Status.NO_KEY, []),
+        ("nonexistent",),
+        format_error_message("No keys found similar to `nonexistent`."),
+    ),
+    (
+        handle_remove,
+        ["remove", "key1", "value1", "value2"],
+        "remove",
+        create_result(Status.OK, None),
+        ("key1", ["value1", "value2"]),
+        format_success_message(
+            "Values removed successfully",
+            "*Key*\n\n`key1`\n\n*Values*\n```\n- value1\n- value2\n```",
+        ),
+    ),
+    (
+        handle_remove,
+        ["remove", "key1", "value1"],
+        "remove",
+        create_result(Status.NO_KEY, None),
+        ("key1", ["value1"]),
+        format_error_message("Key `key1` not found."),
+    ),
+    (
+        handle_remove,
+        ["remove", "key1", "value1"],
+        "remove",
+        create_result(Status.NO_VALUES, None),
+        ("key1", ["value1"]),
+        format_error_message(
+            "Values not found.\n\n*Key*\n```\nkey1\n```\n\n*Values*\n```\n- value1\n```"
+        ),
+    ),
+    (
+        handle_delete,
+        ["delete", "key1"],
+        "delete",
+        create_result(Status.OK, None),
+        ("key1",),
+        format_success_message("Key deleted successfully", "*Key*\n```\nkey1\n```"),
+    ),
+    (
+        handle_delete,
+        ["delete", "key1"],
+        "delete",
+        create_result(Status.NO_KEY, None),
+        ("key1",),
+        format_error_message("Key `key1` not found."),
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    ("handler", "args", "repo_method", "repo_result", "call_args", "expected"),
+    SINGLE_CALL_CASES,
+    ids=[
+        f"{method}-{result.status}" for _, _, method, result, _, _ in SINGLE_CALL_CASES
+    ],
+)
+async def test_handle_dispatch(
+    repo_mock: AsyncMock,
+    handler: Callable[[AsyncMock, list[str]], Awaitable[str]],
+    args: list[str],
+    repo_method: str,
+    repo_result: Result,
+    call_args: tuple[object, ...],
+    expected: str,
+) -> None:
+    method = getattr(repo_mock, repo_method)
+    method.return_value = repo_result
+
+    response = await handler(repo_mock, args)
+    assert response == expected
+    method.assert_awaited_once_with(*call_args)
 
 
 # Tests for handle_list
@@ -297,3 +367,15 @@ async def test_handle_list_no_keys(repo_mock: AsyncMock) -> None:
     response = await handle_list(repo_mock)
     assert response == format_error_message("No keys found.")
     repo_mock.list_keys.assert_awaited_once()
+
+
+# Tests for the dispatch table
+def test_dispatch_covers_all_commands() -> None:
+    assert set(_DISPATCH) == set(Commands)
+
+
+async def test_dispatch_list_ignores_args(repo_mock: AsyncMock) -> None:
+    repo_mock.list_keys.return_value = create_result(Status.OK, ["key1"])
+
+    response = await _DISPATCH[Commands.LIST](repo_mock, ["list", "extra"])
+    assert response == await handle_list(repo_mock)
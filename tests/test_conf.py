@@ -1,13 +1,27 @@
+import functools
+from pathlib import Path
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
+from dotenv import load_dotenv
+from pydantic import ValidationError
 
-from src.conf import Env, Settings, create_settings
+from src.conf import Env, Settings, _create_settings, _load_env, create_settings
+
+
+@pytest.fixture(autouse=True)
+def _clear_settings_cache() -> Generator[None, None, None]:
+    """Fixture to drop settings cached by earlier tests or imports."""
+    _load_env.cache_clear()
+    _create_settings.cache_clear()
+    yield
+    _load_env.cache_clear()
+    _create_settings.cache_clear()
 
 
 @pytest.fixture
-def mock_env_vars() -> Generator[dict[str, str], None, None]:
+def mock_env_vars(monkeypatch: pytest.MonkeyPatch) -> dict[str, str]:
     """Fixture to mock environment variables."""
     env_vars = {
         "ENVIRONMENT": "local",
@@ -16,8 +30,9 @@ def mock_env_vars() -> Generator[dict[str, str], None, None]:
         "LOCAL_TELEGRAM_BOT_TOKEN": "mock_local_telegram_token",
         "LOCAL_LOGFIRE_TOKEN": "mock_local_logfire_token",
     }
-    with patch.dict("os.environ", env_vars, clear=True):
-        yield env_vars
+    for name, value in env_vars.items():
+        monkeypatch.setenv(name, value)
+    return env_vars
 
 
 @pytest.fixture
@@ -39,34 +54,71 @@ def test_create_settings_valid_env(mock_env_vars: dict[str, str]) -> None:
 
 
 @pytest.mark.usefixtures("mock_dotenv")
-def test_create_settings_invalid_env() -> None:
+def test_create_settings_invalid_env(monkeypatch: pytest.MonkeyPatch) -> None:
     """Test creating settings with an invalid environment."""
-    with patch.dict("os.environ", {"ENVIRONMENT": "INVALID"}, clear=True):
-        with pytest.raises(AssertionError, match="Invalid environment: INVALID"):
-            create_settings()
+    monkeypatch.setenv("ENVIRONMENT", "INVALID")
+    with pytest.raises(AssertionError, match="Invalid environment: INVALID"):
+        create_settings()
 
 
 @pytest.mark.usefixtures("mock_dotenv")
-def test_create_settings_no_env_variable() -> None:
+def test_create_settings_no_env_variable(monkeypatch: pytest.MonkeyPatch) -> None:
     """Test creating settings without ENVIRONMENT variable."""
-    with patch.dict("os.environ", {}, clear=True):
-        with pytest.raises(AssertionError, match="Environment not set"):
-            create_settings()
+    monkeypatch.delenv("ENVIRONMENT", raising=False)
+    with pytest.raises(AssertionError, match="Environment not set"):
+        create_settings()
 
 
 @pytest.mark.usefixtures("mock_dotenv")
-def test_create_settings_invalid_env_variable() -> None:
+def test_create_settings_invalid_env_variable(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
     """Test creating settings with an invalid ENVIRONMENT variable."""
-    with patch.dict("os.environ", {"ENVIRONMENT": "INVALID"}, clear=True):
-        with pytest.raises(AssertionError, match="Invalid environment: INVALID"):
-            create_settings()
+    monkeypatch.setenv("ENVIRONMENT", "INVALID")
+    with pytest.raises(AssertionError, match="Invalid environment: INVALID"):
+        create_settings()
 
 
 @pytest.mark.usefixtures("mock_dotenv")
 def test_env_prefix_behavior(mock_env_vars: dict[str, str]) -> None:
     """Test settings loading respects the environment prefix."""
-    with patch.dict("os.environ", mock_env_vars, clear=True):
-        settings = create_settings(Env.LOCAL)
-        assert isinstance(settings, Settings)
-        assert settings.turso_database_url == mock_env_vars["LOCAL_TURSO_DATABASE_URL"]
-        assert settings.turso_auth_token == mock_env_vars["LOCAL_TURSO_AUTH_TOKEN"]
+    settings = create_settings(Env.LOCAL)
+    assert isinstance(settings, Settings)
+    assert settings.turso_database_url == mock_env_vars["LOCAL_TURSO_DATABASE_URL"]
+    assert settings.turso_auth_token == mock_env_vars["LOCAL_TURSO_AUTH_TOKEN"]
+
+
+@pytest.mark.usefixtures("mock_env_vars")
+def test_create_settings_is_cached(mock_dotenv: MagicMock) -> None:
+    """Test that settings are built once per environment."""
+    settings = create_settings()
+    assert create_settings(Env.LOCAL) is settings
+    mock_dotenv.assert_called_once_with()
+
+
+@pytest.mark.usefixtures("mock_dotenv", "mock_env_vars")
+def test_settings_are_frozen() -> None:
+    """Test that the shared settings instance can't be mutated."""
+    settings = create_settings()
+    with pytest.raises(ValidationError):
+        settings.turso_database_url = "other_url"
+
+
+def test_create_settings_env_from_dotenv(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that an ENVIRONMENT set only in the .env file is picked up."""
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "ENVIRONMENT=local\nLOCAL_TURSO_DATABASE_URL=dotenv_database_url\n"
+    )
+
+    # Record the current values so the ones loaded from the file are undone
+    for name in ("ENVIRONMENT", "LOCAL_TURSO_DATABASE_URL"):
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+
+    with patch("src.conf.load_dotenv", functools.partial(load_dotenv, env_file)):
+        settings = create_settings()
+
+    assert settings.turso_database_url == "dotenv_database_url"
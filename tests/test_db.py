@@ -1,29 +1,94 @@
+import asyncio
 import logging
+from pathlib import Path
 from typing import Any
-from unittest.mock import AsyncMock, mock_open, patch
+from unittest.mock import AsyncMock, patch
 
+import libsql_client
 from libsql_client import Client
 
-from src.db import get_db_client, init_db
+import src.db
+from src.db import (
+    _client_url,
+    _load_ddl_statements,
+    close_db_client,
+    create_db_client,
+    get_db_client,
+    init_db,
+    split_sql,
+)
 
 
-async def test_init_db() -> None:
+async def test_init_db(tmp_path: Path) -> None:
+    (tmp_path / "ddl.sql").write_text("CREATE TABLE test;")
     mock_client = AsyncMock()
     mock_client.__aenter__.return_value = mock_client
     mock_client.__aexit__.return_value = None
 
-    with (
-        patch("libsql_client.create_client", return_value=mock_client),
-        patch("builtins.open", mock_open(read_data="CREATE TABLE test;")),
-        patch("sqlparse.split", return_value=["CREATE TABLE test;"]),
-    ):
-        await init_db("mock_url", "mock_token", "mock_sql_dir")
+    with patch("libsql_client.create_client", return_value=mock_client):
+        await init_db("mock_url", "mock_token", str(tmp_path))
+
+        mock_client.batch.assert_awaited_once_with(["CREATE TABLE test;"])
+
+
+async def test_init_db_enables_wal_for_local_files(tmp_path: Path) -> None:
+    _load_ddl_statements.cache_clear()
+    db_url = f"file:{tmp_path / 'test.db'}"
+
+    await init_db(db_url, "", "sql/")
+
+    async with libsql_client.create_client(db_url) as client:
+        result_set = await client.execute("PRAGMA journal_mode")
+    assert result_set.rows[0][0] == "wal"
+    _load_ddl_statements.cache_clear()
+
+
+def test_split_sql() -> None:
+    sql = (
+        "-- Leading comment; not a split point\n"
+        "CREATE TABLE t (a TEXT DEFAULT ';');\n"
+        "CREATE TRIGGER tr AFTER INSERT ON t\n"
+        "BEGIN\n"
+        "    SELECT CASE WHEN 1 THEN 'x' END;\n"
+        "    DELETE FROM t; /* ; */\n"
+        "END;\n"
+        ";\n"
+        "SELECT 1\n"
+        "-- Trailing comment\n"
+    )
+    assert split_sql(sql) == [
+        "-- Leading comment; not a split point\nCREATE TABLE t (a TEXT DEFAULT ';');",
+        "CREATE TRIGGER tr AFTER INSERT ON t\n"
+        "BEGIN\n"
+        "    SELECT CASE WHEN 1 THEN 'x' END;\n"
+        "    DELETE FROM t; /* ; */\n"
+        "END;",
+        "SELECT 1\n-- Trailing comment",
+    ]
+
 
-        mock_client.execute.assert_awaited_once_with("CREATE TABLE test;")
+def test_split_sql_ddl_file() -> None:
+    stmts = split_sql(Path("sql/ddl.sql").read_text())
+    assert len(stmts) == 6
+    assert all(stmt.endswith(";") for stmt in stmts)
+
+
+def test_load_ddl_statements_is_cached(tmp_path: Path) -> None:
+    _load_ddl_statements.cache_clear()
+    ddl_path = tmp_path / "ddl.sql"
+    ddl_path.write_text("CREATE TABLE test;\n")
+
+    assert _load_ddl_statements(ddl_path) == ("CREATE TABLE test;",)
+    ddl_path.unlink()
+    assert _load_ddl_statements(ddl_path) == ("CREATE TABLE test;",)
+
+    assert _load_ddl_statements.cache_info().misses == 1
+    _load_ddl_statements.cache_clear()
 
 
 async def test_get_db_client() -> None:
     mock_client = AsyncMock(spec=Client)
+    mock_client.closed = False
 
     # Mock the return value of create_client to be mock_client
     with (
@@ -31,6 +96,7 @@ async def test_get_db_client() -> None:
             "libsql_client.create_client", return_value=mock_client
         ) as mock_create_client,
         patch("src.db.settings") as mock_settings,
+        patch("src.db._client", None),
     ):
         mock_settings.turso_database_url = "mock_url"
         mock_settings.turso_auth_token = "mock_token"
@@ -43,6 +109,67 @@ async def test_get_db_client() -> None:
         # Verify that the result is the mocked client
         assert result is mock_client
 
+        # Concurrent callers share the same client
+        results = await asyncio.gather(get_db_client(), get_db_client())
+        assert all(client is mock_client for client in results)
+        mock_create_client.assert_called_once()
+
+
+async def test_get_db_client_replaces_closed_client() -> None:
+    closed_client = AsyncMock(spec=Client)
+    closed_client.closed = True
+    mock_client = AsyncMock(spec=Client)
+    mock_client.closed = False
+
+    with (
+        patch("libsql_client.create_client", return_value=mock_client),
+        patch("src.db._client", closed_client),
+    ):
+        assert await get_db_client() is mock_client
+
+
+async def test_close_db_client() -> None:
+    mock_client = AsyncMock(spec=Client)
+    mock_client.closed = False
+
+    with patch("libsql_client.create_client", return_value=mock_client):
+        with patch("src.db._client", None):
+            await get_db_client()
+            await close_db_client()
+
+            mock_client.close.assert_awaited_once()
+            assert src.db._client is None
+
+            # Closing again is a no-op
+            await close_db_client()
+            mock_client.close.assert_awaited_once()
+
+
+def test_create_db_client() -> None:
+    with (
+        patch("libsql_client.create_client") as mock_create_client,
+        patch("src.db.settings") as mock_settings,
+    ):
+        mock_settings.turso_database_url = "mock_url"
+        mock_settings.turso_auth_token = "mock_token"
+
+        # Every call opens a new client instead of reusing the shared one
+        create_db_client()
+        create_db_client()
+
+    assert mock_create_client.call_count == 2
+    mock_create_client.assert_called_with("mock_url", auth_token="mock_token")
+
+
+def test_client_url() -> None:
+    with patch("src.db.settings") as mock_settings:
+        mock_settings.turso_use_http = False
+        assert _client_url("libsql://db.turso.io") == "libsql://db.turso.io"
+
+        mock_settings.turso_use_http = True
+        assert _client_url("libsql://db.turso.io") == "https://db.turso.io"
+        assert _client_url("file:local.db") == "file:local.db"
+
 
 def test_logs(caplog: Any) -> None:
     with caplog.at_level(logging.INFO):
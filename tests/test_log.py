@@ -3,23 +3,27 @@
 import logging
 from collections.abc import Iterator
 from io import StringIO
+from unittest.mock import patch
 
+import logfire
 import pytest
 from _pytest.logging import LogCaptureFixture  # for caplog fixture typing
 
-from src.log import configure_logger
+from src.log import _FORMATTER, configure_logger
 
 
-@pytest.fixture
-def canned_logger() -> Iterator[logging.Logger]:
-    """Fixture to configure the logger for tests with propagate set to True."""
-    logger = logging.getLogger("acrobot")
+@pytest.fixture(scope="session", autouse=True)
+def configured_handlers() -> list[logging.Handler]:
+    """Fixture to configure the logger once and record the handlers it attached."""
+    return configure_logger().handlers[:]
 
-    # Clear any handlers attached to the logger from previous tests
-    logger.handlers = []
 
-    # Call the function that configures the logger
-    configure_logger()
+@pytest.fixture
+def canned_logger(
+    configured_handlers: list[logging.Handler],
+) -> Iterator[logging.Logger]:
+    """Fixture to provide the configured logger with propagate set to True."""
+    logger = logging.getLogger("acrobot")
 
     # Set logger propagation to True for tests
     original_propagate = logger.propagate
@@ -28,7 +32,8 @@ def canned_logger() -> Iterator[logging.Logger]:
     # Yield the logger for use in tests
     yield logger
 
-    # Reset the logger propagate to the original value after test
+    # Restore the configured handlers and propagation after the test
+    logger.handlers = configured_handlers[:]
     logger.propagate = original_propagate
 
 
@@ -45,28 +50,28 @@ def test_configure_logger(
     assert caplog.records[0].message == "Test log message"
 
 
-def test_log_output_format(canned_logger: logging.Logger) -> None:
-    """Test if the log output is formatted correctly."""
-    # Set up a StringIO stream to capture log output
+@pytest.fixture
+def string_logger(
+    canned_logger: logging.Logger,
+) -> tuple[logging.Logger, StringIO]:
+    """Fixture to send the logger's output to a StringIO stream only."""
     stream = StringIO()
     handler = logging.StreamHandler(stream)
     handler.setLevel(logging.INFO)
+    handler.setFormatter(_FORMATTER)
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    handler.setFormatter(formatter)
+    # Swap the configured handlers for the stream one; canned_logger restores them
+    canned_logger.handlers = [handler]
 
-    canned_logger.handlers = []  # Remove any pre-existing handlers
-    canned_logger.addHandler(handler)
-    canned_logger.setLevel(logging.INFO)
+    return canned_logger, stream
 
-    # Log a message and capture the output
-    canned_logger.info("Test log message")
 
-    # Flush the handler and get the output
-    handler.flush()
+def test_log_output_format(string_logger: tuple[logging.Logger, StringIO]) -> None:
+    """Test if the log output is formatted correctly."""
+    logger, stream = string_logger
+
+    # Log a message and capture the output
+    logger.info("Test log message")
     log_output = stream.getvalue()
 
     # Check the log output format
@@ -88,11 +93,13 @@ def test_httpx_logger_level() -> None:
 def test_logfire_handler_configuration() -> None:
     """Test if the logfire handler is configured properly."""
     logger = logging.getLogger("acrobot")
-    configure_logger()
 
-    # Ensure a logfire handler is present
+    # Ensure a logfire handler is present; pytest attaches its own capture
+    # handlers to non-propagating loggers while a test runs
     logfire_handlers = [
-        handler for handler in logger.handlers if isinstance(handler, logging.Handler)
+        handler
+        for handler in logger.handlers
+        if isinstance(handler, logfire.LogfireLoggingHandler)
     ]
     assert len(logfire_handlers) == 1
 
@@ -104,3 +111,20 @@ def test_logfire_handler_configuration() -> None:
     formatter = handler.formatter
     assert formatter._fmt == "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     assert formatter.datefmt == "%Y-%m-%d %H:%M:%S"
+
+
+def test_record_thread_and_process_info_disabled() -> None:
+    """Test that unused per-record thread and process lookups are turned off."""
+    record = logging.makeLogRecord({})
+    assert record.thread is None
+    assert record.process is None
+    assert record.processName is None
+
+
+def test_configure_logger_is_cached() -> None:
+    """Test that repeated calls reuse the logger instead of reconfiguring logfire."""
+    with patch("src.log.logfire") as mock_logfire:
+        logger = configure_logger()
+
+    mock_logfire.configure.assert_not_called()
+    assert logger is logging.getLogger("acrobot")